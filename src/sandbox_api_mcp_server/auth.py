@@ -1,15 +1,72 @@
+import asyncio
+import functools
+import hashlib
 import httpx
-import json
+import jwt
+import orjson
+import os
+import stat
+import tempfile
+import time
+from cachetools import TLRUCache
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 from cryptography.hazmat.primitives import serialization
+from pathlib import Path
 from .helpers import get_logger
 from jwt.algorithms import RSAAlgorithm
 from fastapi import Request, HTTPException, status
-from typing import Any
+from typing import Any, NamedTuple, Optional
 from .models import Auth0Settings
 
 logger = get_logger(__name__)
 
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAXSIZE = 10_000
+JWKS_DEFAULT_MAX_AGE = 3600
+JWKS_MIN_REFRESH_INTERVAL = 30
+
+
+class JwksKey(NamedTuple):
+    pem: str
+    alg: str
+    public_key: RSAPublicKey
+
+
+class JwksCacheEntry(NamedTuple):
+    keys: dict[str, JwksKey]
+    fetched_at: float
+    expires_at: float
+    etag: Optional[str]
+
+
+def _token_cache_ttu(_key: bytes, claims: dict[str, Any], now: float) -> float:
+    # Never keep a verified token around past its own expiry
+    return min(now + TOKEN_CACHE_TTL, claims["exp"])
+
+
+# Verified JWT claims keyed by a digest of the raw token, so repeated requests with
+# the same bearer token skip signature verification until the entry expires.
+_token_cache: TLRUCache = TLRUCache(maxsize=TOKEN_CACHE_MAXSIZE, ttu=_token_cache_ttu, timer=time.time)
+
+_jwks_cache: Optional[JwksCacheEntry] = None
+_jwks_lock = asyncio.Lock()
+_jwks_client: Optional[httpx.AsyncClient] = None
+
+# Decoder with the claim requirements merged into its options once, instead of on every call
+_jwt = jwt.PyJWT(options={"require": ["exp", "iss", "aud"]})
+
+
+@functools.lru_cache(maxsize=1)
+def _auth0() -> Auth0Settings:
+    """Return the process-wide Auth0 settings, parsed from the environment once on first use."""
+    return Auth0Settings()
+
+
+@functools.lru_cache(maxsize=1)
+def _issuer() -> str:
+    """Return the expected token issuer, built once from the Auth0 domain."""
+    return f"https://{_auth0().auth0_domain}/"
+
 
 async def verify_auth(request: Request) -> dict[str, Any]:
     """
@@ -32,81 +89,248 @@ async def verify_auth(request: Request) -> dict[str, Any]:
     """
 
     try:
-        import jwt
-
         auth_header = request.headers.get("authorization", "")
         if not auth_header.startswith("Bearer "):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authorization header")
 
-        token = " ".join(auth_header.split(" ")[1:])
+        token = auth_header[7:]
         if token.startswith("ApiKey "):
             return {"claims": {"sub": "api_key"}, "token": token, "type": "api_key"}
 
-        header = jwt.get_unverified_header(token)
-
-        # Check if this is a JWE token (encrypted token)
-        if header.get("alg") == "dir" and header.get("enc") == "A256GCM":
+        # Check if this is a JWE token (encrypted token). A compact JWE has five
+        # segments versus three for a JWS, so no header parse is needed to tell them apart.
+        if token.count(".") == 4:
             raise ValueError(
                 "Token is encrypted, offline validation not possible. "
                 "This is usually due to not specifying the audience when requesting the token."
             )
 
-        # Otherwise, it's a JWT, we can validate it offline
-        if header.get("alg") in ["RS256", "HS256"]:
-            claims = jwt.decode(
-                token,
-                request.app.state.jwks_public_key,
-                algorithms=["RS256", "HS256"],
-                audience=Auth0Settings().auth0_audience,
-                issuer=f"https://{Auth0Settings().auth0_domain}/",
-                options={"verify_signature": True},
-            )
-            logger.info(f"Verified auth: {claims}")
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        claims = _token_cache.get(cache_key)
+        if claims is not None and claims["exp"] > time.time():
             return {"claims": claims, "token": token, "type": "jwt"}
 
+        # Otherwise, it's a JWT, we can validate it offline in a single decode pass
+        # against the JWKS key it was signed with
+        kid = jwt.get_unverified_header(token).get("kid")
+        # Only accept the algorithm the signing key was published for, never HS256 with an RSA public key
+        key = await get_jwks_public_key(kid)
+        # The already loaded public key is passed so PyJWT doesn't parse the PEM on every request
+        decoded = _jwt.decode_complete(
+            token,
+            key.public_key,
+            algorithms=[key.alg],
+            audience=_auth0().auth0_audience,
+            issuer=_issuer(),
+        )
+        claims = decoded["payload"]
+        _token_cache[cache_key] = claims
+        logger.info(f"Verified auth: {claims}")
+        return {"claims": claims, "token": token, "type": "jwt"}
+
     except Exception as e:
         logger.error(f"Auth error: {str(e)}")
 
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
 
-async def fetch_jwks_public_key(url: str) -> str:
+def _get_jwks_client() -> httpx.AsyncClient:
+    """Return the shared JWKS HTTP client so refreshes reuse one keep-alive connection."""
+    global _jwks_client
+    if _jwks_client is None or _jwks_client.is_closed:
+        _jwks_client = httpx.AsyncClient(
+            # Fail fast on an unreachable Auth0, a JWKS refresh holds up every request waiting on the lock
+            timeout=httpx.Timeout(5.0, connect=2.0),
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
+    return _jwks_client
+
+
+async def close_jwks_client() -> None:
+    """Close the shared JWKS HTTP client, if it was ever opened."""
+    if _jwks_client is not None:
+        await _jwks_client.aclose()
+
+
+def _max_age(response: httpx.Response) -> int:
+    """Return the Cache-Control max-age of a response, falling back to JWKS_DEFAULT_MAX_AGE."""
+    for directive in response.headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age" and value.isdigit():
+            return int(value)
+    return JWKS_DEFAULT_MAX_AGE
+
+
+async def get_jwks_public_key(kid: Optional[str] = None) -> JwksKey:
+    """
+    Get the JWKS public key matching a key ID, refreshing the cached key set only once it
+    has expired or, at most every JWKS_MIN_REFRESH_INTERVAL seconds, when the key ID is unknown.
+    If a refresh fails, the cached keys keep being served until a later refresh succeeds.
+
+    Parameters
+    ----------
+    kid: Optional[str]
+        The key ID from the token header; the first key in the set is used if omitted
+
+    Returns
+    -------
+    JwksKey
+        PEM-formatted public key as a string and the algorithm it signs with
+    """
+    global _jwks_cache
+
+    def lookup(entry: Optional[JwksCacheEntry]) -> Optional[JwksKey]:
+        if entry is None or time.time() >= entry.expires_at:
+            return None
+        if kid is None:
+            return next(iter(entry.keys.values()))
+        return entry.keys.get(kid)
+
+    key = lookup(_jwks_cache)
+    if key is not None:
+        return key
+
+    async with _jwks_lock:
+        # Another request may have refreshed the keys while we were waiting for the lock
+        key = lookup(_jwks_cache)
+        if key is not None:
+            return key
+
+        cached = _jwks_cache
+        if cached is None:
+            # Another worker process may have fetched the keys already
+            _jwks_cache = cached = _load_jwks_file(_auth0().auth0_jwks_url)
+            key = lookup(_jwks_cache)
+            if key is not None:
+                return key
+
+        if cached is None or time.time() >= cached.expires_at or time.time() - cached.fetched_at >= JWKS_MIN_REFRESH_INTERVAL:
+            try:
+                _jwks_cache = await fetch_jwks_public_key(_auth0().auth0_jwks_url, cached=cached)
+            except Exception as e:
+                if cached is None:
+                    raise
+                # Keep serving the keys we have (stale-if-error), so an Auth0 outage doesn't reject
+                # valid tokens, and retry only once JWKS_MIN_REFRESH_INTERVAL has passed
+                logger.error(f"JWKS refresh failed, serving cached public keys: {e}")
+                now = time.time()
+                _jwks_cache = cached._replace(fetched_at=now, expires_at=max(cached.expires_at, now + JWKS_MIN_REFRESH_INTERVAL))
+            key = lookup(_jwks_cache)
+
+    if key is None:
+        raise ValueError(f"No JWKS public key found for kid: {kid}")
+    return key
+
+
+async def fetch_jwks_public_key(url: str, cached: Optional[JwksCacheEntry] = None) -> JwksCacheEntry:
     """
-    Fetch JWKS from a given URL and extract the primary public key in PEM format.
+    Fetch JWKS from a given URL and extract its RSA public keys in PEM format.
 
     Parameters
     ----------
     url: str
         The JWKS URL to fetch from
+    cached: Optional[JwksCacheEntry]
+        A previously fetched entry; its ETag is sent as If-None-Match so an unchanged
+        JWKS only extends the entry's expiry
 
     Returns
     -------
-    str
-        PEM-formatted public key as a string
+    JwksCacheEntry
+        PEM-formatted public keys and their algorithms by key ID, the fetch and expiry timestamps
+        (from Cache-Control max-age) and the ETag
     """
     logger.info(f"Fetching JWKS from: {url}")
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url)
-        response.raise_for_status()
-        jwks_data = response.json()
+    headers = {"If-None-Match": cached.etag} if cached is not None and cached.etag else None
+    response = await _get_jwks_client().get(url, headers=headers)
+    now = time.time()
+    if cached is not None and response.status_code == 304:
+        logger.info("JWKS not modified, extending cached public keys")
+        return cached._replace(fetched_at=now, expires_at=now + _max_age(response))
+
+    response.raise_for_status()
+    jwks_data = orjson.loads(response.content)
+    keys = _parse_jwks_keys(jwks_data)
+    logger.info(f"Successfully extracted {len(keys)} public key(s) from JWKS")
+    entry = JwksCacheEntry(keys, now, now + _max_age(response), response.headers.get("etag"))
+    _store_jwks_file(url, jwks_data, entry)
+    return entry
 
-        if not jwks_data or "keys" not in jwks_data or not jwks_data["keys"]:
-            logger.error("Invalid JWKS data format: missing or empty 'keys' array")
-            raise ValueError("Invalid JWKS data format: missing or empty 'keys' array")
 
-        # Just use the first key in the set
-        jwk = json.dumps(jwks_data["keys"][0])
+def _parse_jwks_keys(jwks_data: Any) -> dict[str, JwksKey]:
+    """Extract the RSA public keys of a parsed JWKS, by key ID."""
+    if not jwks_data or "keys" not in jwks_data or not jwks_data["keys"]:
+        logger.error("Invalid JWKS data format: missing or empty 'keys' array")
+        raise ValueError("Invalid JWKS data format: missing or empty 'keys' array")
 
-        # Convert JWK to PEM format
+    keys: dict[str, JwksKey] = {}
+    for jwk in jwks_data["keys"]:
+        if jwk.get("kty") != "RSA":
+            continue
+
+        # Convert JWK to PEM format; from_jwk accepts the parsed dict, so no re-serialization is needed
         public_key = RSAAlgorithm.from_jwk(jwk)
         if isinstance(public_key, RSAPublicKey):
             pem = public_key.public_bytes(
                 encoding=serialization.Encoding.PEM,
                 format=serialization.PublicFormat.SubjectPublicKeyInfo,
             )
-            pem_str = pem.decode("utf-8")
-            logger.info("Successfully extracted public key from JWKS")
-            return pem_str
-        else:
-            logger.error("Invalid JWKS data format: expected RSA public key")
-            raise ValueError("Invalid JWKS data format: expected RSA public key")
+            keys[jwk.get("kid", "")] = JwksKey(pem.decode("utf-8"), jwk.get("alg", "RS256"), public_key)
+
+    if not keys:
+        logger.error("Invalid JWKS data format: expected RSA public key")
+        raise ValueError("Invalid JWKS data format: expected RSA public key")
+
+    return keys
+
+
+def _jwks_file_path(url: str) -> Path:
+    """Return the file through which worker processes on this host share the JWKS fetched from a URL."""
+    return Path(tempfile.gettempdir()) / f"jwks-{hashlib.sha1(url.encode()).hexdigest()}.json"
+
+
+def _load_jwks_file(url: str) -> Optional[JwksCacheEntry]:
+    """
+    Load the JWKS another worker process stored for a URL, if it hasn't expired yet. The file is
+    only trusted if this user owns it and nobody else can write to it, since it lives in a shared
+    temporary directory.
+    """
+    path = _jwks_file_path(url)
+    try:
+        with path.open("rb") as f:
+            file_stat = os.fstat(f.fileno())
+            # Windows has no uids, its temporary directory is already per user
+            if hasattr(os, "getuid") and (file_stat.st_uid != os.getuid() or file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+                logger.warning(f"Ignoring JWKS cache file with unsafe ownership or permissions: {path}")
+                return None
+            data = orjson.loads(f.read())
+        if time.time() >= data["expires_at"]:
+            return None
+        entry = JwksCacheEntry(_parse_jwks_keys(data["jwks"]), data["fetched_at"], data["expires_at"], data["etag"])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable JWKS cache file {path}: {e}")
+        return None
+
+    logger.info(f"Loaded {len(entry.keys)} JWKS public key(s) from {path}")
+    return entry
+
+
+def _store_jwks_file(url: str, jwks_data: Any, entry: JwksCacheEntry) -> None:
+    """Store a freshly fetched JWKS for other worker processes, replacing the previous file atomically."""
+    path = _jwks_file_path(url)
+    data = {"jwks": jwks_data, "fetched_at": entry.fetched_at, "expires_at": entry.expires_at, "etag": entry.etag}
+    try:
+        # mkstemp creates the file exclusively and readable only by this user
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(data))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Could not store JWKS cache file {path}: {e}")
@@ -0,0 +1,222 @@
+from typing import Callable, Iterable
+from uvicorn._types import ASGI3Application, ASGIReceiveCallable, ASGISendCallable, ASGISendEvent, Scope
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import PlainTextResponse
+
+# Liveness probes hit /health continuously, so its response is built (and its body encoded) only once
+HEALTH_RESPONSE = PlainTextResponse("Ok", status_code=200)
+
+_LOCAL_HOSTS = frozenset({"127.0.0.1", "localhost", "::1"})
+# The scope scheme for each accepted raw X-Forwarded-Proto value, by scope type
+_FORWARDED_SCHEMES: dict[str, dict[bytes, str]] = {
+    "http": {b"http": "http", b"https": "https", b"ws": "ws", b"wss": "wss"},
+    "websocket": {b"http": "ws", b"https": "wss", b"ws": "ws", b"wss": "wss"},
+}
+
+_DISALLOWED_PREFLIGHT_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    (b"content-type", b"text/plain; charset=utf-8"),
+    (b"vary", b"Origin"),
+)
+
+_DISALLOWED_ORIGIN_HEADERS: tuple[tuple[bytes, bytes], ...] = ((b"vary", b"Origin"),)
+
+_SECURITY_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    # Clickjacking protection
+    (b"x-frame-options", b"SAMEORIGIN"),
+    # Prevent MIME type sniffing
+    (b"x-content-type-options", b"nosniff"),
+)
+
+
+def wrap_send(send: ASGISendCallable, on_start: Callable[[ASGISendEvent], None]) -> ASGISendCallable:
+    """
+    Wrap an ASGI send so on_start can modify the http.response.start message before it is sent.
+
+    This is the pattern for middleware in this project: a plain ASGI class wrapping send, never
+    Starlette's BaseHTTPMiddleware, which runs every request through an extra task and memory
+    stream and buffers streaming responses.
+    """
+
+    async def send_wrapper(message: ASGISendEvent) -> None:
+        if message["type"] == "http.response.start":
+            on_start(message)
+        await send(message)
+
+    return send_wrapper
+
+
+def _extend_headers(extra_headers: Iterable[tuple[bytes, bytes]]) -> Callable[[ASGISendEvent], None]:
+    """Return an on_start callback adding headers to the response."""
+
+    def on_start(message: ASGISendEvent) -> None:
+        # A new list, the original may be a response's own raw_headers
+        headers = list(message.get("headers", ()))
+        headers.extend(extra_headers)
+        message["headers"] = headers
+
+    return on_start
+
+
+_add_security_headers = _extend_headers(_SECURITY_HEADERS)
+_add_disallowed_origin_headers = _extend_headers(_DISALLOWED_ORIGIN_HEADERS)
+
+
+def _apply_forwarded_headers(scope: Scope) -> None:
+    """Set the scope's scheme and client from the proxy's forwarded headers, unless the request is local."""
+    # Uvicorn sends no server address for unix socket connections
+    server = scope.get("server")
+    if server and server[0] in _LOCAL_HOSTS:
+        return
+
+    # Scan the raw header list once instead of building a dict of it, keeping the first of each header
+    forwarded_proto = forwarded_for = None
+    for name, value in scope["headers"]:
+        if name == b"x-forwarded-proto":
+            if forwarded_proto is None:
+                forwarded_proto = value
+        elif name == b"x-forwarded-for":
+            if forwarded_for is None:
+                forwarded_for = value
+        else:
+            continue
+        if forwarded_proto is not None and forwarded_for is not None:
+            break
+
+    if forwarded_proto is not None:
+        # Looked up as bytes, so the header is never decoded
+        scheme = _FORWARDED_SCHEMES[scope["type"]].get(forwarded_proto.strip())
+        if scheme is not None:
+            scope["scheme"] = scheme
+
+    # If the x-forwarded-for header is empty then host is an empty string.
+    # Only set the client if we actually got something usable.
+    # See: https://github.com/encode/uvicorn/issues/1068
+    if forwarded_for:
+        # We've lost the connecting client's port information by now,
+        # so only include the host.
+        scope["client"] = (forwarded_for.decode("latin1"), 0)
+
+
+class EdgeMiddleware:
+    """
+    Applies the proxy's X-Forwarded-Proto and X-Forwarded-For headers to the scope and adds the
+    security headers to HTTP responses, in one layer so requests pass through a single extra frame.
+    """
+
+    def __init__(self, app: ASGI3Application) -> None:
+        self.app = app
+        # Dispatch on the scope type with a single lookup, lifespan and any other scope go straight to the app
+        self._handlers = {"http": self._handle_http, "websocket": self._handle_websocket}
+
+    async def __call__(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        return await self._handlers.get(scope["type"], self.app)(scope, receive, send)
+
+    async def _handle_http(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        _apply_forwarded_headers(scope)
+        return await self.app(scope, receive, wrap_send(send, _add_security_headers))
+
+    async def _handle_websocket(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        _apply_forwarded_headers(scope)
+        return await self.app(scope, receive, send)
+
+
+class HealthCheckMiddleware:
+    def __init__(self, app: ASGI3Application) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] == "/health":
+            return await HEALTH_RESPONSE(scope, receive, send)
+
+        return await self.app(scope, receive, send)
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves the responses of paths ending in one of excluded_path_suffixes uncompressed.
+    The compressor holds back a streamed body until it closes, which would defeat the streaming.
+    """
+
+    def __init__(self, app: ASGI3Application, excluded_path_suffixes: tuple[str, ...] = (), **kwargs) -> None:
+        super().__init__(app, **kwargs)
+        self.excluded_path_suffixes = excluded_path_suffixes
+
+    async def __call__(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        if scope["type"] == "http" and scope["path"].endswith(self.excluded_path_suffixes):
+            return await self.app(scope, receive, send)
+        return await super().__call__(scope, receive, send)
+
+
+async def _send_static(send: ASGISendCallable, status: int, headers: Iterable[tuple[bytes, bytes]], body: bytes = b"") -> None:
+    if body:
+        headers = (*headers, (b"content-length", str(len(body)).encode("latin1")))
+    await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+    await send({"type": "http.response.body", "body": body})
+
+
+class CORSAllowlistMiddleware:
+    """
+    CORS for a fixed allowlist of origins, with the response headers for each origin built once.
+    Preflight requests from allowed origins are answered directly, without reaching the app.
+    """
+
+    def __init__(
+        self,
+        app: ASGI3Application,
+        allow_origins: Iterable[str],
+        allow_methods: Iterable[str],
+        allow_headers: Iterable[str],
+        max_age: int = 600,
+    ) -> None:
+        self.app = app
+        methods = ", ".join(allow_methods).encode("latin1")
+        headers = ", ".join(allow_headers).encode("latin1")
+        # The complete response headers for each allowed origin, keyed by its raw Origin header value
+        self.preflight_headers: dict[bytes, tuple[tuple[bytes, bytes], ...]] = {}
+        self.add_response_headers: dict[bytes, Callable[[ASGISendEvent], None]] = {}
+        for origin in allow_origins:
+            raw_origin = origin.encode("latin1")
+            self.preflight_headers[raw_origin] = (
+                (b"access-control-allow-origin", raw_origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-allow-methods", methods),
+                (b"access-control-allow-headers", headers),
+                (b"access-control-max-age", str(max_age).encode("latin1")),
+                (b"vary", b"Origin"),
+            )
+            self.add_response_headers[raw_origin] = _extend_headers((
+                (b"access-control-allow-origin", raw_origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"vary", b"Origin"),
+            ))
+
+    async def __call__(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        origin = None
+        is_preflight = False
+        if scope["method"] == "OPTIONS":
+            for name, value in scope["headers"]:
+                if name == b"origin":
+                    if origin is None:
+                        origin = value
+                elif name == b"access-control-request-method":
+                    is_preflight = True
+        else:
+            for name, value in scope["headers"]:
+                if name == b"origin":
+                    origin = value
+                    break
+
+        if origin is None:
+            return await self.app(scope, receive, send)
+
+        if is_preflight:
+            preflight_headers = self.preflight_headers.get(origin)
+            if preflight_headers is None:
+                return await _send_static(send, 400, _DISALLOWED_PREFLIGHT_HEADERS, b"Disallowed CORS origin")
+            return await _send_static(send, 204, preflight_headers)
+
+        add_cors_headers = self.add_response_headers.get(origin, _add_disallowed_origin_headers)
+        return await self.app(scope, receive, wrap_send(send, add_cors_headers))
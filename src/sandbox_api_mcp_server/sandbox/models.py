@@ -1,40 +1,51 @@
-from typing import Annotated, Optional, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Literal, Optional, Any, Union, get_args
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictFloat, StrictInt, StrictStr
+from pydantic.alias_generators import to_camel
 
 
-USECASE_DESCRIPTION = (
-    "The name of the use case for the sandbox, possible values are: "
-    "blank-sandbox,bloom,citations,contact-tracing,cybersecurity,entity-resolution,fincen,"
-    "fraud-detection,graph-data-science,graph-data-science-blank-sandbox,healthcare-analytics,"
-    "icij-offshoreleaks,icij-paradise-papers,legis-graph,movies,network-management,"
-    "openstreetmap,pole,recommendations,twitch,twitter-trolls,wwc2019,yelp,twitter-v2"
-)
+UseCase = Literal[
+    "blank-sandbox", "bloom", "citations", "contact-tracing", "cybersecurity", "entity-resolution", "fincen",
+    "fraud-detection", "graph-data-science", "graph-data-science-blank-sandbox", "healthcare-analytics",
+    "icij-offshoreleaks", "icij-paradise-papers", "legis-graph", "movies", "network-management",
+    "openstreetmap", "pole", "recommendations", "twitch", "twitter-trolls", "wwc2019", "yelp", "twitter-v2",
+]
 
+USECASE_DESCRIPTION = "The name of the use case for the sandbox, possible values are: " + ",".join(get_args(UseCase))
 
-class StartSandboxBody(BaseModel):
-    usecase: Annotated[str, Field(description=USECASE_DESCRIPTION)]
 
+class SandboxRequestBody(BaseModel):
+    """
+    Base model for request bodies. They are validated once per request and never mutated,
+    so they are frozen and reject unknown fields.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+
+class StartSandboxBody(SandboxRequestBody):
+    usecase: Annotated[UseCase, Field(description=USECASE_DESCRIPTION)]
 
-class StopSandboxBody(BaseModel):
+
+class StopSandboxBody(SandboxRequestBody):
     sandbox_hash_key: Annotated[str, Field(description="The unique hash key identifying the sandbox.")]
 
 
-class ExtendSandboxBody(BaseModel):
+class ExtendSandboxBody(SandboxRequestBody):
     sandbox_hash_key: Annotated[Optional[str], Field(description="Specific sandbox to extend. If None, all user's sandboxes are extended.")] = None
 
 
-class AuraUploadBody(BaseModel):
+class AuraUploadBody(SandboxRequestBody):
     sandbox_hash_key: Annotated[str, Field(description="The unique hash key identifying the sandbox backup to upload.")]
     aura_uri: Annotated[str, Field(description="The Aura instance URI (e.g., neo4j+s://xxxx.databases.neo4j.io).")]
     aura_password: Annotated[str, Field(description="Password for the Aura instance.")]
     aura_username: Annotated[Optional[str], Field(description="Username for the Aura instance (defaults to 'neo4j').")] = "neo4j"
 
 
-class BackupDownloadUrlBody(BaseModel):
+class BackupDownloadUrlBody(SandboxRequestBody):
     key: Annotated[str, Field(description="The S3 key of the backup file to download.")]
 
 
-class FastApiCypherQueryBody(BaseModel):
+class FastApiCypherQueryBody(SandboxRequestBody):
     """
     Base request model for Cypher queries.
     """
@@ -88,3 +99,121 @@ class FastApiReadCypherQueryResponse(BaseModel):
     count: int = Field(
         ..., description="The number of rows returned by the query.", json_schema_extra={"examples": [1]}
     )
+
+
+# A value the API sends, which may be a string, a number or a boolean whatever its documented type.
+# Each member is strict, so the value is passed through unchanged instead of being coerced or rejected.
+JsonScalar = Union[StrictStr, StrictInt, StrictFloat, StrictBool]
+
+
+class SandboxApiResponse(BaseModel):
+    """
+    Base model for Sandbox API responses. Fields use the API's camelCase names on the wire,
+    and any fields not declared here are passed through unchanged.
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, extra="allow")
+
+
+class SandboxInstanceDetails(SandboxApiResponse):
+    """
+    Details of a sandbox instance. See #/components/schemas/SandboxInstanceDetails in swagger.
+    """
+
+    sandbox_hash_key: Optional[JsonScalar] = None
+    status: Optional[JsonScalar] = None
+    password: Optional[JsonScalar] = None
+    sb_type: Optional[JsonScalar] = None
+    usecase: Optional[JsonScalar] = None
+    ip: Optional[JsonScalar] = None
+    privip: Optional[JsonScalar] = None
+    expires: Optional[JsonScalar] = None
+    has_extended: Optional[JsonScalar] = None
+    version: Optional[JsonScalar] = None
+    sandbox_id: Optional[JsonScalar] = None
+
+
+class SandboxListResponse(SandboxApiResponse):
+    """
+    The user's running sandbox instances. See #/components/schemas/RunningInstances in swagger.
+    """
+
+    sandboxes: Optional[list[SandboxInstanceDetails]] = None
+
+
+class SandboxStartResponse(SandboxInstanceDetails):
+    """
+    Response for starting a sandbox. See #/components/schemas/RunInstanceResponse in swagger.
+    """
+
+    error_string: Optional[JsonScalar] = None
+
+
+class SandboxStopResponse(SandboxApiResponse):
+    """
+    Response for stopping a sandbox, empty on success. See #/components/schemas/StopInstanceResponse in swagger.
+    """
+
+
+class SandboxExtendResponse(SandboxApiResponse):
+    """
+    Sandbox lifetime extension status. See #/components/schemas/ExtendResponse in swagger.
+    """
+
+    status: Optional[JsonScalar] = None
+    extended_by_days: Optional[JsonScalar] = None
+    error: Optional[JsonScalar] = None
+
+
+class BackupTaskStatus(SandboxApiResponse):
+    """
+    Status of a backup or Aura upload task. See #/components/schemas/BackupTaskStatus in swagger.
+    """
+
+    id: Optional[JsonScalar] = None
+    status: Optional[JsonScalar] = None
+
+
+class BackupResultResponse(BackupTaskStatus):
+    """
+    Backup task status and result. See #/components/schemas/BackupResultResponse in swagger.
+    """
+
+    result: Any = None
+    error_code: Optional[JsonScalar] = None
+
+
+class BackupListItem(SandboxApiResponse):
+    """
+    A backup file of a sandbox. See #/components/schemas/BackupListItem in swagger.
+    """
+
+    key: Optional[JsonScalar] = None
+    size: Optional[JsonScalar] = None
+    last_modified: Optional[JsonScalar] = Field(None, alias="LastModified")
+
+
+class BackupDownloadUrlResponse(SandboxApiResponse):
+    """
+    Pre-signed backup download URL. See #/components/schemas/BackupDownloadUrlResponse in swagger.
+    """
+
+    download_url: Optional[JsonScalar] = None
+
+
+class AuraUploadResultResponse(BackupTaskStatus):
+    """
+    Aura upload task status and result. See #/components/schemas/AuraUploadResultResponse in swagger.
+    """
+
+    error_code: Optional[JsonScalar] = None
+
+
+class SandboxStartWithSchemaResponse(SandboxApiResponse):
+    """
+    A started sandbox, its details once running and its database schema.
+    """
+
+    start: Optional[SandboxStartResponse] = None
+    details: Optional[SandboxInstanceDetails] = None
+    db_schema: Optional[FastApiReadCypherQueryResponse] = Field(None, alias="schema")
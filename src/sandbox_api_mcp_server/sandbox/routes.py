@@ -1,191 +1,338 @@
+import functools
+import inspect
+import orjson
 from fastapi import APIRouter
-from typing import Annotated, Dict, Optional
-from fastapi import Depends
+from pydantic import BaseModel
+from typing import Annotated, Any, AsyncIterator, Callable, Coroutine, NamedTuple, Optional
+from fastapi import Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi import Query, Path, status
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
 
-from .models import StartSandboxBody, StopSandboxBody, ExtendSandboxBody, AuraUploadBody, BackupDownloadUrlBody, FastApiReadCypherQueryBody, FastApiWriteCypherQueryBody, FastApiReadCypherQueryResponse
+from .models import (
+    StartSandboxBody, StopSandboxBody, ExtendSandboxBody, AuraUploadBody, BackupDownloadUrlBody, FastApiReadCypherQueryBody, FastApiWriteCypherQueryBody, FastApiReadCypherQueryResponse,
+    SandboxListResponse, SandboxStartResponse, SandboxStopResponse, SandboxExtendResponse, SandboxInstanceDetails, SandboxStartWithSchemaResponse,
+    BackupTaskStatus, BackupResultResponse, BackupListItem, BackupDownloadUrlResponse, AuraUploadResultResponse,
+)
 from ..helpers import get_logger
-from .service import call_sandbox_api, SandboxApiClient, get_sandbox_client
+from .service import call_sandbox_api, SandboxApiClient, SandboxApiClientError, get_sandbox_client
 
 logger = get_logger(__name__)
 
 
-def get_sandbox_api_router() -> APIRouter:
-    router = APIRouter()
-
-    # Each operation_id will be the MCP tool name as per fastapi-mcp docs.
-    @router.get("/list-sandboxes", operation_id="list_sandboxes_for_user", tags=["Sandbox"], response_model=Dict)
-    async def list_sandboxes(
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """List all running sandbox instances for the authenticated user."""
-        # timezone: Optional[str] = Query(None, description="User's timezone for accurate expiration calculation.")
-        # The original tool didn't expose timezone, keeping it simple here.
-        try:
-            return await call_sandbox_api("list_sandboxes_for_user", client)
-        except Exception as e:
-            logger.error(f"Error listing sandboxes: {e}")
-            raise e
-
-    @router.post("/start-sandbox", operation_id="start_new_sandbox", tags=["Sandbox"], response_model=Dict, status_code=status.HTTP_201_CREATED)
-    async def start_sandbox(
-        body: StartSandboxBody,
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Starts a new sandbox instance for a specified use case."""
-        try:
-            return await call_sandbox_api("start_sandbox", client, usecase=body.usecase)
-        except Exception as e:
-            logger.error(f"Error starting sandbox: {e}")
-            raise e
-
-    @router.post("/terminate-sandbox", operation_id="terminate_sandbox", tags=["Sandbox"], response_model=Dict)
-    async def terminate_sandbox(
-        body: StopSandboxBody,
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Stops/terminates a specific sandbox instance."""
-        try:
-            return await call_sandbox_api("stop_sandbox", client, sandbox_hash_key=body.sandbox_hash_key)
-        except Exception as e:
-            logger.error(f"Error stopping sandbox: {e}")
-            raise e
-
-    @router.post("/extend-sandbox", operation_id="extend_sandbox_lifetime", tags=["Sandbox"], response_model=Dict)
-    async def extend_sandbox(
-        body: ExtendSandboxBody,
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Extends the lifetime of a sandbox or all sandboxes for the user."""
-        try:
-            return await call_sandbox_api("extend_sandbox", client, sandbox_hash_key=body.sandbox_hash_key)
-        except Exception as e:
-            logger.error(f"Error extending sandbox: {e}")
-            raise e
-
-    @router.get("/get-sandbox-details/{sandbox_hash_key}", operation_id="get_sandbox_connection_details", tags=["Sandbox"], response_model=Dict)
-    async def get_sandbox_details(
-        sandbox_hash_key: Annotated[str, Path(description="The unique hash key identifying the sandbox.")],
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-        *,  # Make subsequent parameters keyword-only
-        verify_connect: Annotated[Optional[bool], Query(description="If true, verifies connection to the sandbox.")] = False
-    ):
-        """Gets connection details for a specific sandbox."""
-        try:
-            return await call_sandbox_api("get_sandbox_details", client, sandbox_hash_key=sandbox_hash_key, verify_connect=verify_connect)
-        except Exception as e:
-            logger.error(f"Error getting sandbox details: {e}")
-            raise e
+class LoggingRoute(APIRoute):
+    """
+    Route class that logs any unexpected error raised while handling a request, with its traceback,
+    so endpoints don't each need a try/except. HTTP errors and request validation errors are
+    expected outcomes and are re-raised without logging.
+    """
 
-    # --- Backup Related Endpoints ---
-    @router.post("/request-backup/{sandbox_hash_key}", operation_id="request_sandbox_backup", tags=["Backup"], response_model=Dict)
-    async def request_backup_ep(
-        sandbox_hash_key: Annotated[str, Path(description="The unique hash key identifying the sandbox.")],
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Requests a backup for a specific sandbox."""
-        try:
-            return await call_sandbox_api("request_backup", client, sandbox_hash_key=sandbox_hash_key)
-        except Exception as e:
-            logger.error(f"Error requesting backup: {e}")
-            raise e
-
-    @router.get("/backups/result/{result_id}", operation_id="get_backup_result", tags=["Backup"], response_model=Dict)
-    async def get_backup_result_ep(
-        result_id: Annotated[str, Path(description="The ID of the backup/upload task result.")],
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Retrieves the result of a specific backup task."""
-        try:
-            return await call_sandbox_api("get_backup_result", client, result_id=result_id)
-        except Exception as e:
-            logger.error(f"Error getting backup result: {e}")
-            raise e
-
-    @router.get("/list-backups/{sandbox_hash_key}", operation_id="list_sandbox_backups", tags=["Backup"], response_model=Dict)
-    async def list_backups_ep(
-        sandbox_hash_key: Annotated[str, Path(description="The unique hash key identifying the sandbox.")],
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Lists available backups for a specific sandbox."""
-        try:
-            return await call_sandbox_api("list_backups", client, sandbox_hash_key=sandbox_hash_key)
-        except Exception as e:
-            logger.error(f"Error listing backups: {e}")
-            raise e
-
-    @router.post("/get-backup-download-url/{sandbox_hash_key}", operation_id="get_sandbox_backup_download_url", tags=["Backup"], response_model=Dict)
-    async def get_backup_download_url_ep(
-        sandbox_hash_key: Annotated[str, Path(description="The unique hash key identifying the sandbox.")],
-        body: BackupDownloadUrlBody,
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Gets a download URL for a specific sandbox backup file."""
-        try:
-            return await call_sandbox_api("get_backup_download_url", client, sandbox_hash_key=sandbox_hash_key, key=body.key)
-        except Exception as e:
-            logger.error(f"Error getting backup download URL: {e}")
-            raise e
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+
+        async def logging_route_handler(request: Request) -> Response:
+            try:
+                return await route_handler(request)
+            except (HTTPException, RequestValidationError):
+                raise
+            except Exception:
+                logger.exception(f"Error in {self.operation_id or self.name}")
+                raise
+
+        return logging_route_handler
+
+
+class SandboxEndpoint(NamedTuple):
+    """A route that forwards its parameters to a single SandboxApiClient method."""
+
+    method: str
+    path: str
+    operation_id: str
+    api_method_name: str
+    name: str
+    tags: list[str]
+    response_model: Any
+    description: Optional[str] = None
+    parameters: tuple[inspect.Parameter, ...] = ()
+    status_code: int = status.HTTP_200_OK
+    # The SandboxApiClient method yielding the result rows, for the NDJSON variant of the route
+    stream_method_name: Optional[str] = None
+
+
+def _param(name: str, annotation: Any, default: Any = inspect.Parameter.empty) -> inspect.Parameter:
+    return inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation, default=default)
+
+
+def _sandbox_hash_key_path() -> inspect.Parameter:
+    return _param("sandbox_hash_key", Annotated[str, Path(description="The unique hash key identifying the sandbox.")])
+
+
+# Appended to the path of the NDJSON variant of a route
+STREAM_PATH_SUFFIX = "/stream"
+
+_CLIENT_PARAMETER = _param("client", Annotated[SandboxApiClient, Depends(get_sandbox_client)])
 
+# Each operation_id will be the MCP tool name as per fastapi-mcp docs.
+SANDBOX_ENDPOINTS: tuple[SandboxEndpoint, ...] = (
+    SandboxEndpoint(
+        "GET", "/list-sandboxes",
+        operation_id="list_sandboxes_for_user",
+        api_method_name="list_sandboxes_for_user",
+        name="list_sandboxes",
+        tags=["Sandbox"],
+        response_model=SandboxListResponse,
+        # The original tool didn't expose timezone, keeping it simple here.
+        description="List all running sandbox instances for the authenticated user.",
+    ),
+    SandboxEndpoint(
+        "POST", "/start-sandbox",
+        operation_id="start_new_sandbox",
+        api_method_name="start_sandbox",
+        name="start_sandbox",
+        tags=["Sandbox"],
+        response_model=SandboxStartResponse,
+        description="Starts a new sandbox instance for a specified use case.",
+        parameters=(_param("body", StartSandboxBody),),
+        status_code=status.HTTP_201_CREATED,
+    ),
+    SandboxEndpoint(
+        "POST", "/start-sandbox-and-get-schema",
+        operation_id="start_sandbox_and_get_schema",
+        api_method_name="start_sandbox_and_get_schema",
+        name="start_sandbox_and_get_schema",
+        tags=["Sandbox"],
+        response_model=SandboxStartWithSchemaResponse,
+        description="Starts a new sandbox instance for a specified use case, waits until it is running and returns its connection details and database schema.",
+        parameters=(_param("body", StartSandboxBody),),
+        status_code=status.HTTP_201_CREATED,
+    ),
+    SandboxEndpoint(
+        "POST", "/terminate-sandbox",
+        operation_id="terminate_sandbox",
+        api_method_name="stop_sandbox",
+        name="terminate_sandbox",
+        tags=["Sandbox"],
+        response_model=SandboxStopResponse,
+        description="Stops/terminates a specific sandbox instance.",
+        parameters=(_param("body", StopSandboxBody),),
+    ),
+    SandboxEndpoint(
+        "POST", "/extend-sandbox",
+        operation_id="extend_sandbox_lifetime",
+        api_method_name="extend_sandbox",
+        name="extend_sandbox",
+        tags=["Sandbox"],
+        response_model=SandboxExtendResponse,
+        description="Extends the lifetime of a sandbox or all sandboxes for the user.",
+        parameters=(_param("body", ExtendSandboxBody),),
+    ),
+    SandboxEndpoint(
+        "GET", "/get-sandbox-details/{sandbox_hash_key}",
+        operation_id="get_sandbox_connection_details",
+        api_method_name="get_sandbox_details",
+        name="get_sandbox_details",
+        tags=["Sandbox"],
+        response_model=SandboxInstanceDetails,
+        description="Gets connection details for a specific sandbox.",
+        parameters=(
+            _sandbox_hash_key_path(),
+            _param("verify_connect", Annotated[Optional[bool], Query(description="If true, verifies connection to the sandbox.")], False),
+        ),
+    ),
+    # --- Backup Related Endpoints ---
+    SandboxEndpoint(
+        "POST", "/request-backup/{sandbox_hash_key}",
+        operation_id="request_sandbox_backup",
+        api_method_name="request_backup",
+        name="request_backup_ep",
+        tags=["Backup"],
+        response_model=BackupTaskStatus,
+        description="Requests a backup for a specific sandbox.",
+        parameters=(_sandbox_hash_key_path(),),
+    ),
+    SandboxEndpoint(
+        "GET", "/backups/result/{result_id}",
+        operation_id="get_backup_result",
+        api_method_name="get_backup_result",
+        name="get_backup_result_ep",
+        tags=["Backup"],
+        response_model=BackupResultResponse,
+        description="Retrieves the result of a specific backup task.",
+        parameters=(_param("result_id", Annotated[str, Path(description="The ID of the backup/upload task result.")]),),
+    ),
+    SandboxEndpoint(
+        "GET", "/list-backups/{sandbox_hash_key}",
+        operation_id="list_sandbox_backups",
+        api_method_name="list_backups",
+        name="list_backups_ep",
+        tags=["Backup"],
+        response_model=list[BackupListItem],
+        description="Lists available backups for a specific sandbox.",
+        parameters=(_sandbox_hash_key_path(),),
+    ),
+    SandboxEndpoint(
+        "POST", "/get-backup-download-url/{sandbox_hash_key}",
+        operation_id="get_sandbox_backup_download_url",
+        api_method_name="get_backup_download_url",
+        name="get_backup_download_url_ep",
+        tags=["Backup"],
+        response_model=BackupDownloadUrlResponse,
+        description="Gets a download URL for a specific sandbox backup file.",
+        parameters=(_sandbox_hash_key_path(), _param("body", BackupDownloadUrlBody)),
+    ),
     # --- Aura Upload Related Endpoints ---
-    @router.post("/upload-to-aura", operation_id="upload_sandbox_to_aura", tags=["Aura"], response_model=Dict)
-    async def upload_to_aura_ep(
-        body: AuraUploadBody,
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Uploads a sandbox backup to an Aura instance."""
-        try:
-            return await call_sandbox_api(
-                "upload_to_aura",
-                client,
-                sandbox_hash_key=body.sandbox_hash_key,
-                aura_uri=body.aura_uri,
-                aura_password=body.aura_password,
-                aura_username=body.aura_username,
-            )
-        except Exception as e:
-            logger.error(f"Error uploading to Aura: {e}")
-            raise e
-
-    @router.get("/aura-upload/result/{result_id}", operation_id="get_aura_upload_result", tags=["Aura"], response_model=Dict)
-    async def get_aura_upload_result_ep(
-        result_id: Annotated[str, Path(description="The ID of the Aura upload task result.")],
-        client: Annotated[SandboxApiClient, Depends(get_sandbox_client)],
-    ):
-        """Retrieves the result of a specific Aura upload task."""
-        try:
-            return await call_sandbox_api("get_aura_upload_result", client, result_id=result_id)
-        except Exception as e:
-            logger.error(f"Error getting Aura upload result: {e}")
-            raise e
+    SandboxEndpoint(
+        "POST", "/upload-to-aura",
+        operation_id="upload_sandbox_to_aura",
+        api_method_name="upload_to_aura",
+        name="upload_to_aura_ep",
+        tags=["Aura"],
+        response_model=BackupTaskStatus,
+        description="Uploads a sandbox backup to an Aura instance.",
+        parameters=(_param("body", AuraUploadBody),),
+    ),
+    SandboxEndpoint(
+        "GET", "/aura-upload/result/{result_id}",
+        operation_id="get_aura_upload_result",
+        api_method_name="get_aura_upload_result",
+        name="get_aura_upload_result_ep",
+        tags=["Aura"],
+        response_model=AuraUploadResultResponse,
+        description="Retrieves the result of a specific Aura upload task.",
+        parameters=(_param("result_id", Annotated[str, Path(description="The ID of the Aura upload task result.")]),),
+    ),
+    # --- Query Related Endpoints ---
+    SandboxEndpoint(
+        "GET", "/query/schema",
+        operation_id="get_schema",
+        api_method_name="get_schema",
+        name="get_schema",
+        tags=["Query"],
+        response_model=FastApiReadCypherQueryResponse,
+        parameters=(_param("hash_key", str),),
+    ),
+    SandboxEndpoint(
+        "POST", "/query/read",
+        operation_id="read_query",
+        api_method_name="read_query",
+        name="read",
+        tags=["Query"],
+        response_model=FastApiReadCypherQueryResponse,
+        parameters=(_param("cypher_query", FastApiReadCypherQueryBody),),
+        stream_method_name="stream_read_query",
+    ),
+    SandboxEndpoint(
+        "POST", "/query/write",
+        operation_id="write_query",
+        api_method_name="write_query",
+        name="write",
+        tags=["Query"],
+        response_model=FastApiReadCypherQueryResponse,
+        parameters=(_param("cypher_query", FastApiWriteCypherQueryBody),),
+        stream_method_name="stream_write_query",
+    ),
+)
 
-    @router.get("/query/schema", operation_id="get_schema", tags=["Query"], response_model=FastApiReadCypherQueryResponse)
-    async def get_schema(hash_key: str, client: Annotated[SandboxApiClient, Depends(get_sandbox_client)]):
-        try:
-            return await call_sandbox_api("get_schema", client, hash_key=hash_key)
-        except Exception as e:
-            logger.error(f"Error getting schema: {e}")
-            raise e
 
-    @router.post("/query/read", operation_id="read_query", tags=["Query"], response_model=FastApiReadCypherQueryResponse)
-    async def read(cypher_query: FastApiReadCypherQueryBody, client: Annotated[SandboxApiClient, Depends(get_sandbox_client)]):
-        try:
-            return await call_sandbox_api("read_query", client, hash_key=cypher_query.hash_key, query=cypher_query.query, params=cypher_query.params)
-        except Exception as e:
-            logger.error(f"Error reading query: {e}")
-            raise e
+def _api_kwargs(kwargs: dict[str, Any]) -> dict[str, Any]:
+    """Flatten request bodies into the keyword arguments of the SandboxApiClient method."""
+    api_kwargs: dict[str, Any] = {}
+    for name, value in kwargs.items():
+        if isinstance(value, BaseModel):
+            api_kwargs.update(value.model_dump(exclude_none=True))
+        else:
+            api_kwargs[name] = value
+    return api_kwargs
+
+
+def _make_endpoint(endpoint: SandboxEndpoint) -> Callable[..., Coroutine[Any, Any, Any]]:
+    """Build the FastAPI endpoint function for a SandboxEndpoint."""
+    api_method_name = endpoint.api_method_name
+
+    async def sandbox_endpoint(client: SandboxApiClient, **kwargs: Any) -> Any:
+        return await call_sandbox_api(api_method_name, client, **_api_kwargs(kwargs))
+
+    sandbox_endpoint.__name__ = endpoint.name
+    sandbox_endpoint.__doc__ = endpoint.description
+    # FastAPI reads the endpoint's parameters from its signature
+    sandbox_endpoint.__signature__ = inspect.Signature([*endpoint.parameters, _CLIENT_PARAMETER])  # type: ignore[attr-defined]
+    return sandbox_endpoint
+
+
+async def _ndjson_rows(first_row: dict[str, Any], rows: AsyncIterator[dict[str, Any]]) -> AsyncIterator[bytes]:
+    yield orjson.dumps(first_row) + b"\n"
+    async for row in rows:
+        yield orjson.dumps(row) + b"\n"
 
-    @router.post("/query/write", operation_id="write_query", tags=["Query"], response_model=FastApiReadCypherQueryResponse)
-    async def write(cypher_query: FastApiWriteCypherQueryBody, client: Annotated[SandboxApiClient, Depends(get_sandbox_client)]):
+
+def _make_stream_endpoint(endpoint: SandboxEndpoint) -> Callable[..., Coroutine[Any, Any, Any]]:
+    """
+    Build the FastAPI endpoint function for the NDJSON variant of a SandboxEndpoint, which relays
+    the result rows while the Sandbox API is still sending them.
+    """
+    stream_method_name = endpoint.stream_method_name
+
+    async def sandbox_stream_endpoint(client: SandboxApiClient, **kwargs: Any) -> Response:
+        rows = getattr(client, stream_method_name)(**_api_kwargs(kwargs))
+        # Wait for the first row before answering, so an upstream error still gets its status code
         try:
-            return await call_sandbox_api("write_query", client, hash_key=cypher_query.hash_key, query=cypher_query.query, params=cypher_query.params)
-        except Exception as e:
-            logger.error(f"Error writing query: {e}")
-            raise e
+            first_row = await rows.__anext__()
+        except StopAsyncIteration:
+            return Response(status_code=endpoint.status_code, media_type="application/x-ndjson")
+        except SandboxApiClientError as e:
+            raise HTTPException(status_code=e.status_code or 500, detail=str(e)) from e
+        return StreamingResponse(_ndjson_rows(first_row, rows), status_code=endpoint.status_code, media_type="application/x-ndjson")
+
+    sandbox_stream_endpoint.__name__ = f"{endpoint.name}_stream"
+    sandbox_stream_endpoint.__doc__ = endpoint.description
+    sandbox_stream_endpoint.__signature__ = inspect.Signature([*endpoint.parameters, _CLIENT_PARAMETER])  # type: ignore[attr-defined]
+    return sandbox_stream_endpoint
+
+
+@functools.lru_cache(maxsize=1)
+def get_sandbox_api_router() -> APIRouter:
+    router = APIRouter(route_class=LoggingRoute, default_response_class=ORJSONResponse)
 
-    @router.get("/health", tags=["Management"], operation_id="health_check")
-    async def health_check_endpoint() -> PlainTextResponse:
-        return PlainTextResponse("Ok", status_code=200)
+    for endpoint in SANDBOX_ENDPOINTS:
+        router.add_api_route(
+            endpoint.path,
+            _make_endpoint(endpoint),
+            methods=[endpoint.method],
+            operation_id=endpoint.operation_id,
+            name=endpoint.name,
+            tags=endpoint.tags,
+            response_model=endpoint.response_model,
+            response_model_exclude_unset=True,
+            status_code=endpoint.status_code,
+        )
 
     return router
+
+
+@functools.lru_cache(maxsize=1)
+def get_sandbox_stream_router() -> APIRouter:
+    """
+    NDJSON variants of the query endpoints, at <path>/stream. They are kept out of the MCP
+    conversion, MCP tools must return the structured output their schema declares.
+    """
+    router = APIRouter(route_class=LoggingRoute)
+
+    for endpoint in SANDBOX_ENDPOINTS:
+        if endpoint.stream_method_name is None:
+            continue
+        router.add_api_route(
+            f"{endpoint.path}{STREAM_PATH_SUFFIX}",
+            _make_stream_endpoint(endpoint),
+            methods=[endpoint.method],
+            operation_id=f"{endpoint.operation_id}_stream",
+            name=f"{endpoint.name}_stream",
+            tags=endpoint.tags,
+            response_class=StreamingResponse,
+            status_code=endpoint.status_code,
+            description=f"{endpoint.description or ''} The result rows are streamed back as newline-delimited JSON.".strip(),
+        )
+
+    return router
+
@@ -1,8 +1,14 @@
 import asyncio
+import hashlib
 import httpx
+import itertools
+import json
+import orjson
 import os
 import random
-from typing import Annotated, Optional, Dict, Any
+import time
+from cachetools import LRUCache, TLRUCache
+from typing import Annotated, Any, AsyncIterator, Callable, Coroutine, Dict, NamedTuple, Optional
 from fastapi import HTTPException, status, Depends
 
 from ..auth import verify_auth
@@ -11,53 +17,255 @@ from .models import FastApiReadCypherQueryResponse
 
 MAX_RETRIES = 3
 BASE_BACKOFF_DELAY = 1.0
+MAX_BACKOFF_DELAY = 8.0
+RESPONSE_CACHE_MAXSIZE = 10_000
+SANDBOX_DETAILS_CACHE_TTL = 5
+SANDBOX_LIST_CACHE_TTL = 15
+BACKUP_LIST_CACHE_TTL = 30
+SCHEMA_CACHE_TTL = 300
+SANDBOX_READY_POLL_INTERVAL = 2.0
+SANDBOX_READY_TIMEOUT = 60.0
 logger = get_logger(__name__)
 
+_SCHEMA_QUERY = (
+    "call apoc.meta.data() yield label, property, type, other, unique, index, elementType "
+    "where elementType = 'node' and not label starts with '_' "
+    "with label, collect(case when type <> 'RELATIONSHIP' "
+    "then [property, type + case when unique then ' unique' else '' end + "
+    "case when index then ' indexed' else '' end] end) as attributes, "
+    "collect(case when type = 'RELATIONSHIP' then [property, head(other)] end) as relationships "
+    "return label, apoc.map.fromPairs(attributes) as attributes, "
+    "apoc.map.fromPairs(relationships) as relationships"
+)
+
+# A private generator for retry jitter, so retries don't contend on the shared module-level random instance
+_RNG = random.Random(int.from_bytes(os.urandom(8), "big"))
+# Upper bound of the full-jitter backoff delay before each retry
+_BACKOFF_CAPS: tuple[float, ...] = tuple(min(BASE_BACKOFF_DELAY * (2 ** i), MAX_BACKOFF_DELAY) for i in range(MAX_RETRIES))
+
 
 class SandboxApiClientError(Exception):
-    def __init__(self, message: str, status_code: Optional[int] = None):
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None, retryable: Optional[bool] = None):
         super().__init__(message)
         self.status_code = status_code
+        self.retry_after = retry_after
+        # None lets call_sandbox_api decide from the status code
+        self.retryable = retryable
+
+
+class SandboxApiStatusError(SandboxApiClientError):
+    """An error response from the Sandbox API, formatted into a message only when it is displayed."""
+
+    def __init__(self, api_message: str, status_code: int, upstream_endpoint: str, retry_after: Optional[float] = None):
+        super().__init__(api_message, status_code=status_code, retry_after=retry_after)
+        self.api_message = api_message
+        self.upstream_endpoint = upstream_endpoint
+
+    def __str__(self) -> str:
+        return f"Sandbox API Error ({self.status_code}): {self.api_message}"
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Return the Retry-After delay of a response in seconds, if it was sent as a number of seconds."""
+    value = response.headers.get("retry-after", "").strip()
+    return float(value) if value.isdigit() else None
+
+
+_ERROR_MESSAGE_KEYS = ("error", "Error", "errorString")
+
+
+def _error_message(response: httpx.Response) -> str:
+    """Return the error message from a Sandbox API error response, falling back to its raw text."""
+    try:
+        error_details = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return response.text
+    if not isinstance(error_details, dict):
+        return response.text
+    return next((error_details[key] for key in _ERROR_MESSAGE_KEYS if error_details.get(key)), None) or str(error_details.get("errors", {}))
+
+
+def _query_response(rows: list[dict[str, Any]]) -> FastApiReadCypherQueryResponse:
+    """Wrap Cypher result rows without validating them, which would copy every row of an already parsed body."""
+    return FastApiReadCypherQueryResponse.model_construct(data=rows, count=len(rows))
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+async def _iter_json_array(chunks: AsyncIterator[str]) -> AsyncIterator[Any]:
+    """Yield the elements of a JSON array as its text arrives, so the whole array is never held in memory."""
+    buffer = ""
+    position = 0
+    opened = False
+    async for chunk in chunks:
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                break
+            if not opened:
+                if buffer[position] != "[":
+                    raise SandboxApiClientError("Sandbox API did not return a JSON array", status_code=502, retryable=False)
+                opened = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                element, end = _JSON_DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # The element continues in the next chunk
+            if end == len(buffer):
+                break  # A number could continue in the next chunk, the closing bracket always follows
+            yield element
+            position = end
+    raise SandboxApiClientError("Sandbox API response ended before the end of the JSON array", status_code=502, retryable=False)
+
+
+_BASE_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+_sandbox_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_sandbox_http_client() -> httpx.AsyncClient:
+    """Return the process-wide HTTP client for the Sandbox API, so requests share its connection pool."""
+    global _sandbox_http_client
+    if _sandbox_http_client is None or _sandbox_http_client.is_closed:
+        hostname = os.getenv("SANDBOX_API_HOSTNAME", "https://api.sandbox.neo4j.com")
+        _sandbox_http_client = httpx.AsyncClient(
+            base_url=hostname,
+            headers=_BASE_HEADERS,
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+        )
+    return _sandbox_http_client
+
+
+async def close_sandbox_http_client() -> None:
+    """Close the shared Sandbox API HTTP client, if it was ever opened."""
+    if _sandbox_http_client is not None:
+        await _sandbox_http_client.aclose()
+
+
+class CachedResponse(NamedTuple):
+    result: Any
+    ttl: float
+
+
+def _response_cache_ttu(_key: tuple, value: CachedResponse, now: float) -> float:
+    return now + value.ttl
+
+
+# Responses of read-only calls keyed by (token digest, cache generation, method, endpoint, params, body), so
+# agents re-querying the same state within a few seconds don't round-trip to the Sandbox API
+_response_cache: TLRUCache = TLRUCache(maxsize=RESPONSE_CACHE_MAXSIZE, ttu=_response_cache_ttu, timer=time.monotonic)
+# Cacheable requests currently in flight, by the same key, so concurrent identical calls share one upstream round-trip
+_inflight_requests: dict[tuple, asyncio.Task] = {}
+
+# The current response cache generation of each token digest, part of every cache key. A write moves the
+# user to a new generation, so all their cached responses, and any in-flight read that would store one,
+# become unreachable at once. An evicted digest simply gets a new generation, which only costs cache misses.
+_cache_generations: LRUCache = LRUCache(maxsize=RESPONSE_CACHE_MAXSIZE)
+_generation_counter = itertools.count()
+
+
+def _cache_generation(token_digest: bytes) -> int:
+    generation = _cache_generations.get(token_digest)
+    if generation is None:
+        generation = _cache_generations[token_digest] = next(_generation_counter)
+    return generation
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Mark a shared request's exception as retrieved, every caller may have been cancelled before it arrived
+    if not task.cancelled():
+        task.exception()
 
 
 class SandboxApiClient:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, client: Optional[httpx.AsyncClient] = None):
         if not access_token:
             raise ValueError("access_token cannot be empty.")
-        hostname = os.getenv("SANDBOX_API_HOSTNAME", "https://api.sandbox.neo4j.com")
         self.access_token = access_token
-        self.client = httpx.AsyncClient(base_url=hostname, timeout=30.0)
-        self.headers = {
-            "Authorization": self.access_token,
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        }
+        self.client = client or get_sandbox_http_client()
+        # The shared client already sends _BASE_HEADERS, only the token varies per user
+        self.headers = {"Authorization": self.access_token}
+        self._token_digest = hashlib.blake2b(access_token.encode(), digest_size=16).digest()
 
     async def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, json_data: Optional[Dict[str, Any]] = None) -> Any:
-        logger.info(f"Requesting {method} {endpoint} with params: {params} and json_data: {json_data}")
+        logger.info("Requesting %s %s with params: %s and json_data: %s", method, endpoint, params, json_data)
         try:
             response = await self.client.request(method, endpoint, params=params, json=json_data, headers=self.headers)
-            response.raise_for_status()
-            if response.status_code == 204 or response.status_code == 202:
-                return None  # Or an empty dict, depending on desired non-content response
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error: {e.response.status_code} - {e.response.text}")
-            try:
-                error_details = e.response.json()
-                err_msg = error_details.get("error") or error_details.get("Error") or error_details.get("errorString") or str(error_details.get("errors", {}))
-                raise SandboxApiClientError(f"Sandbox API Error ({e.response.status_code}): {err_msg}", status_code=e.response.status_code) from e
-            except Exception:
-                raise SandboxApiClientError(f"Sandbox API Error ({e.response.status_code}): {e.response.text}", status_code=e.response.status_code) from e
         except httpx.RequestError as e:
-            logger.error(f"Request error: {e}")
+            logger.error("Request error: %s", e)
             raise SandboxApiClientError(f"Request failed: {e}", status_code=503) from e  # Service Unavailable
-        except Exception as e:
-            logger.error(f"Unexpected error in API client: {e}", exc_info=True)
-            raise SandboxApiClientError(f"An unexpected error occurred: {e}", status_code=500) from e
 
-    async def close(self):
-        await self.client.aclose()
+        # Branch on the status code, an error response is an expected outcome and only needs
+        # the one exception raised to callers
+        if response.is_success:
+            if response.status_code == 204 or response.status_code == 202:
+                return None  # Or an empty dict, depending on desired non-content response
+            return orjson.loads(response.content)
+
+        logger.error("HTTP error: %s - %s", response.status_code, response.text)
+        raise SandboxApiStatusError(
+            _error_message(response),
+            status_code=response.status_code,
+            upstream_endpoint=endpoint,
+            retry_after=_retry_after(response),
+        )
+
+    async def _cached_request(self, ttl: float, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, json_data: Optional[Dict[str, Any]] = None) -> Any:
+        """Like _request, but serves the response from the per-user response cache for up to ttl seconds."""
+        key = (
+            self._token_digest,
+            _cache_generation(self._token_digest),
+            method,
+            endpoint,
+            orjson.dumps(params, option=orjson.OPT_SORT_KEYS),
+            orjson.dumps(json_data, option=orjson.OPT_SORT_KEYS),
+        )
+        cached = _response_cache.get(key)
+        if cached is not None:
+            logger.info("Cache hit for %s %s", method, endpoint)
+            return cached.result
+
+        task = _inflight_requests.get(key)
+        if task is not None:
+            logger.info("Joining in-flight %s %s", method, endpoint)
+        else:
+            logger.info("Cache miss for %s %s", method, endpoint)
+            # The upstream call runs in a task of its own, which no caller owns
+            task = asyncio.ensure_future(self._fetch_and_cache(key, ttl, method, endpoint, params, json_data))
+            _inflight_requests[key] = task
+            task.add_done_callback(_retrieve_exception)
+        # Shielded, so a cancelled caller, the first one included, doesn't cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, key: tuple, ttl: float, method: str, endpoint: str, params: Optional[Dict[str, Any]], json_data: Optional[Dict[str, Any]]) -> Any:
+        """Run a request shared by concurrent _cached_request calls and cache its response."""
+        try:
+            result = await self._request(method, endpoint, params=params, json_data=json_data)
+            # A write finished while this was in flight, so the result may already be out of date
+            if key[1] == _cache_generations.get(self._token_digest):
+                _response_cache[key] = CachedResponse(result, ttl)
+            return result
+        finally:
+            _inflight_requests.pop(key, None)
+
+    async def _write_request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None, json_data: Optional[Dict[str, Any]] = None) -> Any:
+        """Like _request, for calls that change the user's sandboxes, so their cached responses are dropped afterwards."""
+        try:
+            return await self._request(method, endpoint, params=params, json_data=json_data)
+        finally:
+            self._invalidate_cache()
+
+    def _invalidate_cache(self) -> None:
+        """Drop the user's cached responses by moving them to a new cache generation."""
+        _cache_generations[self._token_digest] = next(_generation_counter)
 
     async def list_sandboxes_for_user(self, timezone: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -76,7 +284,7 @@ class SandboxApiClient:
             params["timezone"] = timezone
 
         return {
-            "sandboxes": await self._request("GET", "/SandboxGetRunningInstancesForUser", params=params),
+            "sandboxes": await self._cached_request(SANDBOX_LIST_CACHE_TTL, "GET", "/SandboxGetRunningInstancesForUser", params=params),
         }
 
     async def start_sandbox(self, usecase: str) -> Dict[str, Any]:
@@ -95,7 +303,7 @@ class SandboxApiClient:
             Dict[str, Any]: Sandbox instance details or draft confirmation.
                             See #/components/schemas/RunInstanceResponse in swagger.
         """
-        return await self._request("POST", "/SandboxRunInstance", json_data={"usecase": usecase})
+        return await self._write_request("POST", "/SandboxRunInstance", json_data={"usecase": usecase})
 
     async def stop_sandbox(self, sandbox_hash_key: str) -> Optional[Dict[str, Any]]:
         """
@@ -110,7 +318,7 @@ class SandboxApiClient:
                                      or no running tasks found. See #/components/schemas/StopInstanceResponse.
         """
         json_data = {"sandboxHashKey": sandbox_hash_key}
-        return await self._request("POST", "/SandboxStopInstance", json_data=json_data)
+        return await self._write_request("POST", "/SandboxStopInstance", json_data=json_data)
 
     async def extend_sandbox(self, sandbox_hash_key: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -126,7 +334,7 @@ class SandboxApiClient:
         json_data: Dict[str, Any] = {}
         if sandbox_hash_key:
             json_data["sandboxHashKey"] = sandbox_hash_key
-        return await self._request("POST", "/SandboxExtend", json_data=json_data)
+        return await self._write_request("POST", "/SandboxExtend", json_data=json_data)
 
     async def get_sandbox_details(self, sandbox_hash_key: str, verify_connect: Optional[bool] = False) -> Dict[str, Any]:
         """
@@ -144,7 +352,7 @@ class SandboxApiClient:
         params = {"sandboxHashKey": sandbox_hash_key}
         if verify_connect is not None:
             params["verifyConnect"] = verify_connect
-        return await self._request("GET", "/SandboxAuthdGetInstanceByHashKey", params=params)
+        return await self._cached_request(SANDBOX_DETAILS_CACHE_TTL, "GET", "/SandboxAuthdGetInstanceByHashKey", params=params)
 
     async def request_backup(self, sandbox_hash_key: str) -> Dict[str, Any]:
         """
@@ -158,7 +366,7 @@ class SandboxApiClient:
             Dict[str, Any]: Backup task initiation status. See #/components/schemas/BackupTaskStatus.
         """
         endpoint = f"/SandboxBackup/request/{sandbox_hash_key}"
-        return await self._request("POST", endpoint)
+        return await self._write_request("POST", endpoint)
 
     async def get_backup_result(self, result_id: str) -> Dict[str, Any]:
         """
@@ -188,7 +396,7 @@ class SandboxApiClient:
                             Returns an empty list if no backups or sandbox not accessible.
         """
         endpoint = f"/SandboxBackup/{sandbox_hash_key}"
-        return await self._request("GET", endpoint)
+        return await self._cached_request(BACKUP_LIST_CACHE_TTL, "GET", endpoint)
 
     async def get_backup_download_url(self, sandbox_hash_key: str, key: str) -> Dict[str, Any]:
         """
@@ -248,17 +456,10 @@ class SandboxApiClient:
         Retrieves the schema of the Neo4j database.
         Corresponds to POST /SandboxQuery in swagger.
         """
-        schema_query = (
-            "call apoc.meta.data() yield label, property, type, other, unique, index, elementType "
-            "where elementType = 'node' and not label starts with '_' "
-            "with label, collect(case when type <> 'RELATIONSHIP' "
-            "then [property, type + case when unique then ' unique' else '' end + "
-            "case when index then ' indexed' else '' end] end) as attributes, "
-            "collect(case when type = 'RELATIONSHIP' then [property, head(other)] end) as relationships "
-            "return label, apoc.map.fromPairs(attributes) as attributes, "
-            "apoc.map.fromPairs(relationships) as relationships"
-        )
-        return await self.read_query(hash_key, schema_query)
+        result = await self._cached_request(SCHEMA_CACHE_TTL, "POST", "/SandboxRunQuery",
+                                            json_data={"hash_key": hash_key, "statement": _SCHEMA_QUERY, "params": None,
+                                                       "accessMode": "Read"})
+        return _query_response(result)
 
     async def read_query(self, hash_key: str, query: str, params: Optional[Dict[str, Any]] = None) -> FastApiReadCypherQueryResponse:
         """
@@ -268,16 +469,112 @@ class SandboxApiClient:
         result = await self._request("POST", "/SandboxRunQuery",
                                     json_data={"hash_key": hash_key, "statement": query, "params": params,
                                                "accessMode": "Read"})
-        return FastApiReadCypherQueryResponse(data=result, count=len(result))
+        return _query_response(result)
 
     async def write_query(self, hash_key: str, query: str, params: Optional[Dict[str, Any]] = None) -> FastApiReadCypherQueryResponse:
         """
         Executes a write query on the Neo4j database.
         Corresponds to POST /SandboxQuery in swagger.
         """
-        result = await self._request("POST", "/SandboxRunQuery",
-                                      json_data={"hash_key": hash_key, "statement": query, "params": params})
-        return FastApiReadCypherQueryResponse(data=result, count=len(result))
+        result = await self._write_request("POST", "/SandboxRunQuery",
+                                            json_data={"hash_key": hash_key, "statement": query, "params": params})
+        return _query_response(result)
+
+    async def _stream_query(self, json_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Run a Cypher query, yielding its result rows while the Sandbox API is still sending them."""
+        logger.info("Streaming POST /SandboxRunQuery with json_data: %s", json_data)
+        try:
+            async with self.client.stream("POST", "/SandboxRunQuery", json=json_data, headers=self.headers) as response:
+                if not response.is_success:
+                    await response.aread()
+                    logger.error("HTTP error: %s - %s", response.status_code, response.text)
+                    raise SandboxApiStatusError(
+                        _error_message(response),
+                        status_code=response.status_code,
+                        upstream_endpoint="/SandboxRunQuery",
+                        retry_after=_retry_after(response),
+                    )
+                async for row in _iter_json_array(response.aiter_text()):
+                    yield row
+        except httpx.RequestError as e:
+            logger.error("Request error: %s", e)
+            raise SandboxApiClientError(f"Request failed: {e}", status_code=503) from e
+
+    async def stream_read_query(self, hash_key: str, query: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Like read_query, yielding the result rows as they arrive."""
+        async for row in self._stream_query({"hash_key": hash_key, "statement": query, "params": params, "accessMode": "Read"}):
+            yield row
+
+    async def stream_write_query(self, hash_key: str, query: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Like write_query, yielding the result rows as they arrive."""
+        try:
+            async for row in self._stream_query({"hash_key": hash_key, "statement": query, "params": params}):
+                yield row
+        finally:
+            self._invalidate_cache()
+
+    async def start_sandbox_and_get_schema(self, usecase: str) -> Dict[str, Any]:
+        """
+        Starts a sandbox, waits until it accepts connections and retrieves its database schema,
+        so agents get a ready-to-query sandbox in a single call.
+
+        Args:
+            usecase (str): The name of the use case for the sandbox, see start_sandbox.
+
+        Returns:
+            Dict[str, Any]: The start response ("start"), the sandbox details once it is running ("details")
+                            and its schema ("schema").
+        """
+        start = await self.start_sandbox(usecase)
+        sandbox_hash_key = (start or {}).get("sandboxHashKey")
+        if not sandbox_hash_key:
+            raise SandboxApiClientError(f"Sandbox API did not return a sandbox hash key: {start}", status_code=502, retryable=False)
+
+        # Once the sandbox was started, retrying the whole call would start it again, so any
+        # later error is final; transient errors while polling are waited out instead
+        try:
+            # Poll upstream directly, the cached details would keep reporting a pending sandbox
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + SANDBOX_READY_TIMEOUT
+            params = {"sandboxHashKey": sandbox_hash_key, "verifyConnect": True}
+            while True:
+                try:
+                    details = await self._request("GET", "/SandboxAuthdGetInstanceByHashKey", params=params)
+                except SandboxApiClientError as e:
+                    if not _is_retryable(e) or loop.time() >= deadline:
+                        raise
+                    logger.warning("Polling sandbox %s failed with %s, polling again", sandbox_hash_key, e.status_code)
+                else:
+                    if isinstance(details, dict) and details.get("status") == "RUNNING":
+                        break
+                    if loop.time() >= deadline:
+                        raise SandboxApiClientError(f"Sandbox {sandbox_hash_key} was not ready after {SANDBOX_READY_TIMEOUT:.0f}s", status_code=504)
+                await asyncio.sleep(SANDBOX_READY_POLL_INTERVAL)
+
+            schema = await self.get_schema(sandbox_hash_key)
+        except SandboxApiClientError as e:
+            e.retryable = False
+            raise
+        return {"start": start, "details": details, "schema": schema}
+
+
+# The SandboxApiClient methods call_sandbox_api may dispatch to, resolved once at import
+SANDBOX_API_METHODS: dict[str, Callable[..., Coroutine[Any, Any, Any]]] = {
+    name: getattr(SandboxApiClient, name)
+    for name in (
+        "list_sandboxes_for_user", "start_sandbox", "stop_sandbox", "extend_sandbox", "get_sandbox_details",
+        "request_backup", "get_backup_result", "list_backups", "get_backup_download_url",
+        "upload_to_aura", "get_aura_upload_result", "get_schema", "read_query", "write_query",
+        "start_sandbox_and_get_schema",
+    )
+}
+
+
+def _is_retryable(e: SandboxApiClientError) -> bool:
+    """Whether a failed call may be retried, rate limits and server errors are unless the error says otherwise."""
+    if e.retryable is not None:
+        return e.retryable
+    return e.status_code == 429 or (e.status_code is not None and 500 <= e.status_code < 600)
 
 
 def get_sandbox_client(user: Annotated[Dict[str, Any], Depends(verify_auth)]) -> SandboxApiClient:
@@ -285,41 +582,47 @@ def get_sandbox_client(user: Annotated[Dict[str, Any], Depends(verify_auth)]) ->
 
 
 async def call_sandbox_api(api_method_name: str, client: SandboxApiClient, **kwargs):
-    logger.info(f"Calling {api_method_name} with kwargs: {kwargs}")
+    logger.info("Calling %s with kwargs: %s", api_method_name, kwargs)
+
+    method_to_call = SANDBOX_API_METHODS.get(api_method_name)
+    if method_to_call is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown Sandbox API method: {api_method_name}")
 
     retries = 0
     last_exception = None
-    method_to_call = getattr(client, api_method_name)
 
     while retries < MAX_RETRIES:
         try:
-            result = await method_to_call(**kwargs)
+            result = await method_to_call(client, **kwargs)
             return result if result is not None else {}  # Ensure consistent empty dict for 204/202
         except SandboxApiClientError as e:
             last_exception = e
             # Check for rate limit or specific retryable errors (e.g., 503)
             # This is a simplified check; real rate limit headers (X-Rate-Limit-Reset) should be handled if available
-            is_retryable = e.status_code == 429 or (e.status_code and 500 <= e.status_code < 600)
-            if is_retryable:
+            if _is_retryable(e):
                 retries += 1
                 if retries >= MAX_RETRIES:
-                    logger.error(f"API call {api_method_name} failed after {MAX_RETRIES} retries. Last error: {e}")
+                    logger.error("API call %s failed after %d retries. Last error: %s", api_method_name, MAX_RETRIES, e)
                     raise HTTPException(status_code=e.status_code or 503, detail=str(e))
 
-                wait_time = BASE_BACKOFF_DELAY * (2 ** (retries - 1)) + random.uniform(0, 0.5)
-                logger.warning(f"API call {api_method_name} failed with {e.status_code}. Retrying in {wait_time:.2f}s. Attempt {retries}/{MAX_RETRIES}.")
+                # Honor the API's Retry-After when given, otherwise spread retries with full jitter
+                if e.retry_after is not None:
+                    wait_time = min(e.retry_after, MAX_BACKOFF_DELAY)
+                else:
+                    wait_time = _RNG.random() * _BACKOFF_CAPS[retries - 1]
+                logger.warning("API call %s failed with %s. Retrying in %.2fs. Attempt %d/%d.", api_method_name, e.status_code, wait_time, retries, MAX_RETRIES)
                 await asyncio.sleep(wait_time)
             else:
                 # Non-retryable SandboxApiClientError
-                logger.error(f"API call {api_method_name} failed with non-retryable error: {e}")
+                logger.error("API call %s failed with non-retryable error: %s", api_method_name, e)
                 raise HTTPException(status_code=e.status_code or 500, detail=str(e))
         except Exception as e:
             # Unexpected errors not from SandboxApiClientError
-            logger.exception(f"Unexpected error calling Sandbox API method {api_method_name}: {e}")
+            logger.exception("Unexpected error calling Sandbox API method %s: %s", api_method_name, e)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected internal server error occurred.")
 
     # Should not be reached if MAX_RETRIES > 0 and an exception was always raised
-    logger.info(f"Last exception: {last_exception}")
+    logger.info("Last exception: %s", last_exception)
     if last_exception:
         raise HTTPException(status_code=last_exception.status_code or 500, detail=str(last_exception))
 
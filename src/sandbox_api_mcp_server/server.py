@@ -1,99 +1,69 @@
+import functools
 import os
+import sys
 import uvicorn
 
-from anyio import get_cancelled_exc_class
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastmcp import FastMCP
-from fastmcp.server.openapi import RouteMap, MCPType
-from uvicorn._types import ASGI3Application, ASGIReceiveCallable, ASGISendCallable, Scope
-from starlette.middleware.base import BaseHTTPMiddleware
-from .auth import fetch_jwks_public_key
-from .models import Auth0Settings
-from .sandbox.routes import get_sandbox_api_router
+from .auth import get_jwks_public_key, close_jwks_client
+from .middleware import CORSAllowlistMiddleware, EdgeMiddleware, HealthCheckMiddleware, StreamingGZipMiddleware
+from .sandbox.routes import STREAM_PATH_SUFFIX, get_sandbox_api_router, get_sandbox_stream_router
+from .sandbox.service import close_sandbox_http_client
 from .helpers import get_logger
 
 logger = get_logger(__name__)
 
-load_dotenv()
+# Production containers get their configuration from the environment, so no .env file is read there
+if os.getenv("ENV", "development") != "production":
+    load_dotenv()
+
+CORS_DEFAULT_ORIGINS = ["https://sandbox.neo4j.com"]
+CORS_ALLOW_METHODS = ["GET", "POST", "DELETE", "OPTIONS"]
+# The MCP streamable HTTP and SSE transports send the session, protocol version and resumption headers
+CORS_ALLOW_HEADERS = ["Authorization", "Content-Type", "Mcp-Session-Id", "Mcp-Protocol-Version", "Last-Event-ID"]
+# Let browsers cache preflight responses for a day
+CORS_MAX_AGE = 86400
+# Compress JSON responses from 1KB, at a level that keeps most of the size win for far less CPU than 9
+GZIP_MINIMUM_SIZE = 1024
+GZIP_COMPRESS_LEVEL = 5
+# Per worker; long-lived SSE and streamable HTTP connections count towards it
+LIMIT_CONCURRENCY = 1024
+# Longer than the 60s idle timeout of typical load balancers, so they never reuse a connection uvicorn just closed
+TIMEOUT_KEEP_ALIVE = 75
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.jwks_public_key = await fetch_jwks_public_key(Auth0Settings().auth0_jwks_url)
+    # Warm the JWKS public key cache
+    await get_jwks_public_key()
     yield
+    await close_jwks_client()
+    await close_sandbox_http_client()
 
 
-class ProxyHeadersMiddleware:
-    def __init__(self, app: ASGI3Application) -> None:
-        self.app = app
-
-    async def __call__(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable) -> None:
-        if scope["type"] == "lifespan":
-            return await self.app(scope, receive, send)
-
-        if scope["server"][0] == "127.0.0.1" or scope["server"][0] == "localhost":
-            return await self.app(scope, receive, send)
-
-        headers = dict(scope["headers"])
-        if b"x-forwarded-proto" in headers:
-            x_forwarded_proto = headers[b"x-forwarded-proto"].decode("latin1").strip()
-
-            if x_forwarded_proto in {"http", "https", "ws", "wss"}:
-                if scope["type"] == "websocket":
-                    scope["scheme"] = x_forwarded_proto.replace("http", "ws")
-                else:
-                    scope["scheme"] = x_forwarded_proto
-
-        if b"x-forwarded-for" in headers:
-            x_forwarded_for = headers[b"x-forwarded-for"].decode("latin1")
-
-            if x_forwarded_for:
-                # If the x-forwarded-for header is empty then host is an empty string.
-                # Only set the client if we actually got something usable.
-                # See: https://github.com/encode/uvicorn/issues/1068
-
-                # We've lost the connecting client's port information by now,
-                # so only include the host.
-                port = 0
-                scope["client"] = (x_forwarded_for, port)
-
-        return await self.app(scope, receive, send)
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        # Clickjacking protection
-        response.headers["X-Frame-Options"] = "SAMEORIGIN"
-        # Prevent MIME type sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        return response
-
-
-def close_on_double_start(app):
-    async def wrapped(scope, receive, send):
-        start_sent = False
-
-        async def check_send(message):
-            nonlocal start_sent
-            if message["type"] == "http.response.start":
-                if start_sent:
-                    raise get_cancelled_exc_class()()
-                start_sent = True
-            await send(message)
-
-        await app(scope, receive, check_send)
+@functools.lru_cache(maxsize=1)
+def build_mcp() -> FastMCP:
+    """
+    Convert the sandbox routes to an MCP server. The OpenAPI introspection and tool schema
+    generation run once per process, however often the app is built.
+    """
+    # Step 1: Create temporary FastAPI app for MCP conversion
+    temp_app = FastAPI(title="SandboxApiMCP", default_response_class=ORJSONResponse)
+    temp_app.include_router(get_sandbox_api_router())
 
-    return wrapped
+    # Step 2: Convert to MCP
+    return FastMCP.from_fastapi(
+        app=temp_app,
+        name="Neo4j Sandbox API MCP Server",
+    )
 
 
-def run():
+def build_app() -> FastAPI:
     """
-    Run the FastAPI server with MCP integration.
+    Build the FastAPI app with MCP integration. Uvicorn calls this factory once in each worker process.
 
     IMPORTANT: This uses a combined lifespan approach because http_app() requires
     its lifespan to be run to initialize the task group. Simply mounting http_app
@@ -101,27 +71,8 @@ def run():
 
     See: https://gofastmcp.com/integrations/asgi#asgi-starlette-fastmcp
     """
-    port = int(os.getenv("PORT", 9100))
-
-    # Step 1: Create temporary FastAPI app for MCP conversion
-    temp_app = FastAPI(title="SandboxApiMCP")
-    temp_app.include_router(get_sandbox_api_router())
-
-    route_maps = [
-        # Exclude health endpoint from MCP tools
-        RouteMap(
-            methods=["GET"],
-            pattern=r".*/health$",
-            mcp_type=MCPType.EXCLUDE,  # Exclude from MCP
-        ),
-    ]
-
-    # Step 2: Convert to MCP and get both transport apps
-    mcp = FastMCP.from_fastapi(
-        app=temp_app,
-        name="Neo4j Sandbox API MCP Server",
-        route_maps=route_maps,
-    )
+    # Steps 1 and 2: Convert the sandbox routes to MCP and get both transport apps
+    mcp = build_mcp()
 
     # Get both transport apps
     sse_app = mcp.sse_app()  # For backward compatibility
@@ -130,24 +81,35 @@ def run():
     # Step 3: Create combined lifespan
     @asynccontextmanager
     async def combined_lifespan(app: FastAPI):
-        # Initialize JWKS public key
-        app.state.jwks_public_key = await fetch_jwks_public_key(Auth0Settings().auth0_jwks_url)
-        # Run MCP app lifespan (required for task group initialization)
-        async with http_app.lifespan(app):
+        # Warm the JWKS public key cache and close the shared HTTP clients on shutdown,
+        # around the MCP app lifespan (required for task group initialization)
+        async with lifespan(app), http_app.lifespan(app):
+            # Build the OpenAPI schema at startup, so the first /openapi.json or /docs request doesn't pay for it
+            app.openapi()
             yield
 
     # Step 4: Create final FastAPI app with combined lifespan
-    app = FastAPI(title="SandboxApiMCP", lifespan=combined_lifespan)
+    app = FastAPI(title="SandboxApiMCP", lifespan=combined_lifespan, default_response_class=ORJSONResponse)
     app.include_router(get_sandbox_api_router())
+    app.include_router(get_sandbox_stream_router())
+    # Innermost, so it compresses the final body; Starlette never compresses text/event-stream,
+    # which leaves the SSE and streamable HTTP transports streaming, and the NDJSON routes are exempted
     app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        StreamingGZipMiddleware,
+        excluded_path_suffixes=(STREAM_PATH_SUFFIX,),
+        minimum_size=GZIP_MINIMUM_SIZE,
+        compresslevel=GZIP_COMPRESS_LEVEL,
     )
-    app.add_middleware(ProxyHeadersMiddleware)
-    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(
+        CORSAllowlistMiddleware,
+        allow_origins=[origin for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin] or CORS_DEFAULT_ORIGINS,
+        allow_methods=CORS_ALLOW_METHODS,
+        allow_headers=CORS_ALLOW_HEADERS,
+        max_age=CORS_MAX_AGE,
+    )
+    app.add_middleware(EdgeMiddleware)
+    # Outermost, so liveness probes skip the rest of the middleware stack
+    app.add_middleware(HealthCheckMiddleware)
 
     # Step 5: Mount both transports for maximum compatibility
     # SSE app mounted at /sse creates routes at /sse/sse
@@ -172,7 +134,42 @@ def run():
     # - This provides backward compatibility with existing API consumers
     # - MCP clients will use the existing FastAPI auth via standard HTTP headers
 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    return app
+
+
+def run():
+    """
+    Run the MCP server with WEB_CONCURRENCY worker processes (default 1).
+    """
+    port = int(os.getenv("PORT", 9100))
+    # Opt-in only: os.cpu_count() reports the host's CPUs rather than a container's limit
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        # The streamable HTTP and SSE transports keep MCP sessions in each worker's memory
+        logger.warning(
+            "Running %d workers: MCP sessions are per worker, so the load balancer must route "
+            "each session's requests to the same worker (sticky sessions)",
+            workers,
+        )
+
+    # Workers need an import string to build their own app. uvloop and httptools are pinned so a
+    # deployment missing them fails at startup instead of silently falling back to asyncio and h11;
+    # uvloop doesn't support Windows, which keeps the asyncio loop. EdgeMiddleware already
+    # handles forwarded headers, so uvicorn's own handling is turned off, and per-request access
+    # log lines are skipped.
+    uvicorn.run(
+        "sandbox_api_mcp_server.server:build_app",
+        factory=True,
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        proxy_headers=False,
+        access_log=False,
+        limit_concurrency=LIMIT_CONCURRENCY,
+        timeout_keep_alive=TIMEOUT_KEEP_ALIVE,
+    )
 
 
 if __name__ == "__main__":